@@ -0,0 +1,11 @@
+"""
+Shared MongoDB access for the API routers.
+The Motor client is created once in the server lifespan and stored on app.state.
+"""
+
+from fastapi import Request
+
+
+def get_db(request: Request):
+    """Return the shared database handle populated during app startup."""
+    return request.app.state.db
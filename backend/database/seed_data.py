@@ -5,20 +5,39 @@ This script creates sample services and testimonials.
 
 import asyncio
 import os
+import logging
+from itertools import islice
 from motor.motor_asyncio import AsyncIOMotorClient
-from datetime import datetime
-import uuid
+from pymongo import UpdateOne
+from datetime import datetime, timezone
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+logger = logging.getLogger(__name__)
 
-async def seed_services():
+# Keep each bulk_write well below MongoDB's 16 MB message limit
+SEED_BATCH_SIZE = 1000
+
+async def upsert_in_batches(collection, documents, batch_size=SEED_BATCH_SIZE):
+    """
+    Insert documents that don't exist yet, keyed on their stable "id".
+    
+    Uses unordered upserts with $setOnInsert so seeding is idempotent. Together with the
+    unique "id" index (created before seeding) this is safe when several workers start at
+    the same time. Returns the number of new documents.
+    """
+    inserted = 0
+    iterator = iter(documents)
+    while batch := list(islice(iterator, batch_size)):
+        ops = [UpdateOne({"id": doc["id"]}, {"$setOnInsert": doc}, upsert=True) for doc in batch]
+        result = await collection.bulk_write(ops, ordered=False)
+        inserted += result.upserted_count
+    return inserted
+
+async def seed_services(db):
     """Seed the database with initial services."""
+    now = datetime.now(timezone.utc)
     services = [
         {
-            "id": str(uuid.uuid4()),
+            "id": "bueroreinigung",
             "title": "Büroreinigung",
             "description": "Professionelle Reinigung für Büros, Praxen und Verwaltungsgebäude",
             "pricing": "Ab 15€ pro Stunde",
@@ -32,11 +51,11 @@ async def seed_services():
             ],
             "category": "commercial",
             "active": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": "wohnungsreinigung",
             "title": "Wohnungsreinigung",
             "description": "Gründliche Reinigung für Ihr Zuhause - von der Grundreinigung bis zur regelmäßigen Pflege",
             "pricing": "Ab 25€ pro Stunde",
@@ -50,11 +69,11 @@ async def seed_services():
             ],
             "category": "residential",
             "active": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": "gewerbereinigung",
             "title": "Gewerbereinigung",
             "description": "Spezialisierte Reinigung für Geschäfte, Restaurants und Industrieobjekte",
             "pricing": "Individuell kalkuliert",
@@ -68,114 +87,144 @@ async def seed_services():
             ],
             "category": "industrial",
             "active": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         }
     ]
     
-    # Check if services already exist
-    existing_count = await db.services.count_documents({})
-    if existing_count == 0:
-        await db.services.insert_many(services)
-        print(f"✅ Inserted {len(services)} services")
+    inserted = await upsert_in_batches(db.services, services)
+    if inserted:
+        logger.info(f"✅ Inserted {inserted} services")
     else:
-        print(f"⚠️ Services already exist ({existing_count} documents)")
+        logger.warning("⚠️ Services already exist")
 
-async def seed_testimonials():
+async def seed_testimonials(db):
     """Seed the database with initial testimonials."""
+    now = datetime.now(timezone.utc)
     testimonials = [
         {
-            "id": str(uuid.uuid4()),
+            "id": "maria-schmidt",
             "name": "Maria Schmidt",
             "company": "Schmidt & Partner",
             "text": "Stinex reinigt unsere Büroräume seit 2 Jahren. Immer zuverlässig und gründlich!",
             "rating": 5,
             "approved": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": "thomas-weber",
             "name": "Thomas Weber",
             "company": "Weber Immobilien",
             "text": "Hervorragender Service! Die Qualität stimmt und das Team ist sehr professionell.",
             "rating": 5,
             "approved": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": "anna-mueller",
             "name": "Anna Müller",
             "company": "Privatkundin",
             "text": "Endlich eine Reinigungsfirma, die hält, was sie verspricht. Sehr empfehlenswert!",
             "rating": 5,
             "approved": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": "peter-krause",
             "name": "Peter Krause",
             "company": "Krause GmbH",
             "text": "Professionelle Zusammenarbeit und faire Preise. Wir sind sehr zufrieden.",
             "rating": 5,
             "approved": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": "lisa-hofmann",
             "name": "Lisa Hofmann",
             "company": "Privatkundin",
             "text": "Schnell, zuverlässig und gründlich. Kann Stinex nur weiterempfehlen!",
             "rating": 5,
             "approved": True,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         }
     ]
     
-    # Check if testimonials already exist
-    existing_count = await db.testimonials.count_documents({})
-    if existing_count == 0:
-        await db.testimonials.insert_many(testimonials)
-        print(f"✅ Inserted {len(testimonials)} testimonials")
+    inserted = await upsert_in_batches(db.testimonials, testimonials)
+    if inserted:
+        logger.info(f"✅ Inserted {inserted} testimonials")
     else:
-        print(f"⚠️ Testimonials already exist ({existing_count} documents)")
+        logger.warning("⚠️ Testimonials already exist")
 
-async def create_indexes():
+async def create_indexes(db):
     """Create database indexes for better performance."""
+    # Unique id indexes turn every by-id lookup, update and delete into a B-tree traversal
+    await db.contacts.create_index("id", unique=True)
+    await db.services.create_index("id", unique=True)
+    await db.testimonials.create_index("id", unique=True)
+    
     # Create indexes for contacts
     await db.contacts.create_index("created_at")
     await db.contacts.create_index("status")
     await db.contacts.create_index("email")
     
-    # Create indexes for services
-    await db.services.create_index("active")
+    # Create indexes for services (only active services are listed publicly, sorted by created_at)
+    await db.services.create_index(
+        [("created_at", 1)],
+        partialFilterExpression={"active": True}
+    )
     await db.services.create_index("category")
     
-    # Create indexes for testimonials
-    await db.testimonials.create_index("approved")
+    # Create indexes for testimonials (only approved ones are listed publicly, newest first)
+    await db.testimonials.create_index(
+        [("created_at", -1)],
+        partialFilterExpression={"approved": True}
+    )
     await db.testimonials.create_index("rating")
     
-    print("✅ Database indexes created")
+    logger.info("✅ Database indexes created")
 
-async def seed_database():
-    """Main seeding function."""
-    print("🌱 Starting database seeding...")
+async def seed_database(db, services=True, testimonials=True):
+    """
+    Main seeding function; uses the caller's database handle (the app's shared client).
+    
+    Only the collections flagged for seeding are touched, so emptying one collection
+    never re-inserts (or resurrects deleted) documents in the other. Expects
+    create_indexes() to have run first, so the unique id indexes guard the upserts.
+    """
+    logger.info("🌱 Starting database seeding...")
     
     try:
-        await seed_services()
-        await seed_testimonials() 
-        await create_indexes()
-        print("🎉 Database seeding completed successfully!")
+        # Let both seeders finish before reporting a failure, so neither is left running unobserved
+        seeders = []
+        if services:
+            seeders.append(seed_services(db))
+        if testimonials:
+            seeders.append(seed_testimonials(db))
+        results = await asyncio.gather(*seeders, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        logger.info("🎉 Database seeding completed successfully!")
         
     except Exception as e:
-        print(f"❌ Error during seeding: {str(e)}")
+        logger.error(f"❌ Error during seeding: {str(e)}")
         raise
+
+async def main():
+    """Seed using a standalone client when run as a script."""
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        db = client[os.environ['DB_NAME']]
+        await create_indexes(db)
+        await seed_database(db)
     finally:
         client.close()
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import Optional
 from datetime import datetime
 from enum import Enum
@@ -16,8 +16,8 @@ class ContactCreate(BaseModel):
     service: Optional[str] = Field(None, max_length=50, description="Requested service type")
     message: str = Field(..., min_length=1, max_length=2000, description="Contact message")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "name": "Max Mustermann",
                 "email": "max@beispiel.de",
@@ -26,6 +26,7 @@ class ContactCreate(BaseModel):
                 "message": "Ich interessiere mich für eine regelmäßige Büroreinigung für unser 200qm Büro."
             }
         }
+    )
 
 class Contact(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -38,8 +39,11 @@ class Contact(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore',
+        frozen=True,
+        populate_by_name=True,
+        json_schema_extra={
             "example": {
                 "id": "123e4567-e89b-12d3-a456-426614174000",
                 "name": "Max Mustermann",
@@ -52,6 +56,7 @@ class Contact(BaseModel):
                 "updated_at": "2025-01-28T10:30:00Z"
             }
         }
+    )
 
 class ContactResponse(BaseModel):
     success: bool = True
@@ -59,8 +64,8 @@ class ContactResponse(BaseModel):
     submission_id: str
     estimated_response: str = "24 Stunden"
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "success": True,
                 "message": "Ihre Nachricht wurde erfolgreich gesendet. Wir melden uns binnen 24 Stunden bei Ihnen.",
@@ -68,6 +73,7 @@ class ContactResponse(BaseModel):
                 "estimated_response": "24 Stunden"
             }
         }
+    )
 
 class ContactUpdate(BaseModel):
     status: Optional[ContactStatus] = None
@@ -78,11 +84,12 @@ class ErrorResponse(BaseModel):
     error: str
     message: str
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "success": False,
                 "error": "validation_error",
                 "message": "Bitte füllen Sie alle Pflichtfelder aus."
             }
-        }
\ No newline at end of file
+        }
+    )
\ No newline at end of file
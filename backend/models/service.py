@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from datetime import datetime
 from enum import Enum
@@ -13,7 +13,7 @@ class ServiceCreate(BaseModel):
     title: str = Field(..., min_length=1, max_length=100)
     description: str = Field(..., min_length=1, max_length=500)
     pricing: str = Field(..., max_length=50)
-    features: List[str] = Field(..., min_items=1)
+    features: List[str] = Field(..., min_length=1)
     category: ServiceCategory
     active: bool = True
 
@@ -28,8 +28,11 @@ class Service(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore',
+        frozen=True,
+        populate_by_name=True,
+        json_schema_extra={
             "example": {
                 "id": "123e4567-e89b-12d3-a456-426614174000",
                 "title": "Büroreinigung",
@@ -46,6 +49,7 @@ class Service(BaseModel):
                 "updated_at": "2025-01-28T10:30:00Z"
             }
         }
+    )
 
 class ServiceUpdate(BaseModel):
     title: Optional[str] = None
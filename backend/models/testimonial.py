@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 import uuid
@@ -20,8 +20,11 @@ class Testimonial(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore',
+        frozen=True,
+        populate_by_name=True,
+        json_schema_extra={
             "example": {
                 "id": "123e4567-e89b-12d3-a456-426614174000",
                 "name": "Maria Schmidt",
@@ -33,6 +36,7 @@ class Testimonial(BaseModel):
                 "updated_at": "2025-01-28T10:30:00Z"
             }
         }
+    )
 
 class TestimonialUpdate(BaseModel):
     name: Optional[str] = None
@@ -1,41 +1,33 @@
-from fastapi import APIRouter, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from database.connection import get_db
+from pymongo.errors import PyMongoError
 from models.contact import Contact, ContactCreate, ContactResponse, ErrorResponse
+from utils.email_service import email_service
 from typing import List
 from datetime import datetime
-import os
 import logging
-from dotenv import load_dotenv
-from pathlib import Path
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 router = APIRouter(prefix="/contact", tags=["contact"])
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
-async def create_contact(contact_data: ContactCreate):
+async def create_contact(contact_data: ContactCreate, background_tasks: BackgroundTasks, db=Depends(get_db)):
     """
     Create a new contact submission.
     
     This endpoint handles contact form submissions from the website.
     All submitted contacts are stored in the database with a 'new' status.
+    If CONTACT_EMAILS_ENABLED is set, notification and confirmation emails are sent
+    after the response is returned.
     """
     try:
         # Create contact object
-        contact = Contact(**contact_data.dict())
+        contact = Contact(**contact_data.model_dump())
         
         # Insert into database
-        contact_dict = contact.dict()
+        contact_dict = contact.model_dump()
         result = await db.contacts.insert_one(contact_dict)
         
         if not result.inserted_id:
@@ -47,6 +39,11 @@ async def create_contact(contact_data: ContactCreate):
         
         logger.info(f"New contact submission created: {contact.id}")
         
+        # Send emails off the request path; failures are logged, never surfaced to the user.
+        # Opt-in via CONTACT_EMAILS_ENABLED: this endpoint is public and has no rate limit.
+        if email_service.cfg.contact_emails_enabled:
+            background_tasks.add_task(email_service.send_submission_emails, contact_data.model_dump())
+        
         # Return success response
         return ContactResponse(
             success=True,
@@ -55,7 +52,7 @@ async def create_contact(contact_data: ContactCreate):
             estimated_response="24 Stunden"
         )
         
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error creating contact: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -63,7 +60,7 @@ async def create_contact(contact_data: ContactCreate):
         )
 
 @router.get("/", response_model=List[Contact])
-async def get_contacts(skip: int = 0, limit: int = 100):
+async def get_contacts(skip: int = 0, limit: int = 100, db=Depends(get_db)):
     """
     Get all contact submissions (for admin use).
     
@@ -74,7 +71,7 @@ async def get_contacts(skip: int = 0, limit: int = 100):
     try:
         contacts = await db.contacts.find().skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
         return [Contact(**contact) for contact in contacts]
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error fetching contacts: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -82,7 +79,7 @@ async def get_contacts(skip: int = 0, limit: int = 100):
         )
 
 @router.get("/{contact_id}", response_model=Contact)
-async def get_contact(contact_id: str):
+async def get_contact(contact_id: str, db=Depends(get_db)):
     """
     Get a specific contact submission by ID.
     """
@@ -94,9 +91,7 @@ async def get_contact(contact_id: str):
                 detail="Kontakt nicht gefunden."
             )
         return Contact(**contact)
-    except HTTPException:
-        raise
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error fetching contact {contact_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -104,7 +99,7 @@ async def get_contact(contact_id: str):
         )
 
 @router.put("/{contact_id}/status")
-async def update_contact_status(contact_id: str, status_update: dict):
+async def update_contact_status(contact_id: str, status_update: dict, db=Depends(get_db)):
     """
     Update the status of a contact submission.
     """
@@ -131,9 +126,7 @@ async def update_contact_status(contact_id: str, status_update: dict):
         
         return {"success": True, "message": "Status erfolgreich aktualisiert."}
         
-    except HTTPException:
-        raise
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error updating contact status {contact_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,28 +1,30 @@
-from fastapi import APIRouter, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Depends, HTTPException, status
+from database.connection import get_db
+from pymongo.errors import PyMongoError
 from models.service import Service, ServiceCreate, ServiceUpdate
+from pymongo import ReturnDocument
 from typing import List
-import os
+from cachetools import TTLCache
 import logging
-from dotenv import load_dotenv
-from pathlib import Path
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 router = APIRouter(prefix="/services", tags=["services"])
 
+# Per-worker cache of the list endpoint, keyed on active_only; cleared on every write
+services_cache = TTLCache(maxsize=2, ttl=60)
+# Bumped on every write, so a read that overlapped a write doesn't cache stale data
+services_cache_generation = 0
+
+def invalidate_services_cache():
+    """Drop cached lists and mark any in-progress reads as stale."""
+    global services_cache_generation
+    services_cache_generation += 1
+    services_cache.clear()
+
 @router.get("/", response_model=List[Service])
-async def get_services(active_only: bool = True):
+async def get_services(active_only: bool = True, db=Depends(get_db)):
     """
     Get all services.
     
@@ -30,10 +32,20 @@ async def get_services(active_only: bool = True):
     - active_only: If True, returns only active services (default: True)
     """
     try:
+        cached = services_cache.get(active_only)
+        if cached is not None:
+            return cached
+        generation = services_cache_generation
+        
         query = {"active": True} if active_only else {}
-        services = await db.services.find(query).sort("created_at", 1).to_list(100)
-        return [Service(**service) for service in services]
-    except Exception as e:
+        # Documents were validated on write; response_model validates them once on the way out.
+        # Iterating the cursor lets Motor fetch the next batch while the current one is consumed.
+        cursor = db.services.find(query, {"_id": 0}).sort("created_at", 1).limit(100)
+        services = [service async for service in cursor]
+        if generation == services_cache_generation:
+            services_cache[active_only] = services
+        return services
+    except PyMongoError as e:
         logger.error(f"Error fetching services: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -41,21 +53,19 @@ async def get_services(active_only: bool = True):
         )
 
 @router.get("/{service_id}", response_model=Service)
-async def get_service(service_id: str):
+async def get_service(service_id: str, db=Depends(get_db)):
     """
     Get a specific service by ID.
     """
     try:
-        service = await db.services.find_one({"id": service_id})
+        service = await db.services.find_one({"id": service_id}, {"_id": 0})
         if not service:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Service nicht gefunden."
             )
-        return Service(**service)
-    except HTTPException:
-        raise
-    except Exception as e:
+        return service
+    except PyMongoError as e:
         logger.error(f"Error fetching service {service_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -63,13 +73,13 @@ async def get_service(service_id: str):
         )
 
 @router.post("/", response_model=Service, status_code=status.HTTP_201_CREATED)
-async def create_service(service_data: ServiceCreate):
+async def create_service(service_data: ServiceCreate, db=Depends(get_db)):
     """
     Create a new service (admin only).
     """
     try:
-        service = Service(**service_data.dict())
-        service_dict = service.dict()
+        service = Service(**service_data.model_dump())
+        service_dict = service.model_dump()
         result = await db.services.insert_one(service_dict)
         
         if not result.inserted_id:
@@ -78,10 +88,11 @@ async def create_service(service_data: ServiceCreate):
                 detail="Fehler beim Erstellen des Services."
             )
         
+        invalidate_services_cache()
         logger.info(f"New service created: {service.id}")
         return service
         
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error creating service: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -89,13 +100,13 @@ async def create_service(service_data: ServiceCreate):
         )
 
 @router.put("/{service_id}", response_model=Service)
-async def update_service(service_id: str, service_update: ServiceUpdate):
+async def update_service(service_id: str, service_update: ServiceUpdate, db=Depends(get_db)):
     """
     Update a service (admin only).
     """
     try:
         # Only update non-None fields
-        update_data = {k: v for k, v in service_update.dict().items() if v is not None}
+        update_data = service_update.model_dump(exclude_none=True)
         
         if not update_data:
             raise HTTPException(
@@ -103,24 +114,24 @@ async def update_service(service_id: str, service_update: ServiceUpdate):
                 detail="Keine Daten zum Aktualisieren bereitgestellt."
             )
         
-        result = await db.services.update_one(
+        # Update and fetch the new version in a single round trip
+        updated_service = await db.services.find_one_and_update(
             {"id": service_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if updated_service is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Service nicht gefunden."
             )
         
-        # Return updated service
-        updated_service = await db.services.find_one({"id": service_id})
-        return Service(**updated_service)
+        invalidate_services_cache()
+        return updated_service
         
-    except HTTPException:
-        raise  
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error updating service {service_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -128,7 +139,7 @@ async def update_service(service_id: str, service_update: ServiceUpdate):
         )
 
 @router.delete("/{service_id}")
-async def delete_service(service_id: str):
+async def delete_service(service_id: str, db=Depends(get_db)):
     """
     Delete a service (admin only).
     """
@@ -141,12 +152,11 @@ async def delete_service(service_id: str):
                 detail="Service nicht gefunden."
             )
         
+        invalidate_services_cache()
         logger.info(f"Service deleted: {service_id}")
         return {"success": True, "message": "Service erfolgreich gelöscht."}
         
-    except HTTPException:
-        raise
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error deleting service {service_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,29 +1,31 @@
-from fastapi import APIRouter, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Depends, HTTPException, status
+from database.connection import get_db
+from pymongo.errors import PyMongoError
 from models.testimonial import Testimonial, TestimonialCreate, TestimonialUpdate
+from pymongo import ReturnDocument
 from typing import List
+from cachetools import TTLCache
 from datetime import datetime
-import os
 import logging
-from dotenv import load_dotenv
-from pathlib import Path
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 router = APIRouter(prefix="/testimonials", tags=["testimonials"])
 
+# Per-worker cache of the list endpoint, keyed on approved_only; cleared on every write
+testimonials_cache = TTLCache(maxsize=2, ttl=60)
+# Bumped on every write, so a read that overlapped a write doesn't cache stale data
+testimonials_cache_generation = 0
+
+def invalidate_testimonials_cache():
+    """Drop cached lists and mark any in-progress reads as stale."""
+    global testimonials_cache_generation
+    testimonials_cache_generation += 1
+    testimonials_cache.clear()
+
 @router.get("/", response_model=List[Testimonial])
-async def get_testimonials(approved_only: bool = True):
+async def get_testimonials(approved_only: bool = True, db=Depends(get_db)):
     """
     Get all testimonials.
     
@@ -31,10 +33,20 @@ async def get_testimonials(approved_only: bool = True):
     - approved_only: If True, returns only approved testimonials (default: True for public view)
     """
     try:
+        cached = testimonials_cache.get(approved_only)
+        if cached is not None:
+            return cached
+        generation = testimonials_cache_generation
+        
         query = {"approved": True} if approved_only else {}
-        testimonials = await db.testimonials.find(query).sort("created_at", -1).to_list(100)
-        return [Testimonial(**testimonial) for testimonial in testimonials]
-    except Exception as e:
+        # Documents were validated on write; response_model validates them once on the way out.
+        # Iterating the cursor lets Motor fetch the next batch while the current one is consumed.
+        cursor = db.testimonials.find(query, {"_id": 0}).sort("created_at", -1).limit(100)
+        testimonials = [testimonial async for testimonial in cursor]
+        if generation == testimonials_cache_generation:
+            testimonials_cache[approved_only] = testimonials
+        return testimonials
+    except PyMongoError as e:
         logger.error(f"Error fetching testimonials: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -42,21 +54,19 @@ async def get_testimonials(approved_only: bool = True):
         )
 
 @router.get("/{testimonial_id}", response_model=Testimonial)
-async def get_testimonial(testimonial_id: str):
+async def get_testimonial(testimonial_id: str, db=Depends(get_db)):
     """
     Get a specific testimonial by ID.
     """
     try:
-        testimonial = await db.testimonials.find_one({"id": testimonial_id})
+        testimonial = await db.testimonials.find_one({"id": testimonial_id}, {"_id": 0})
         if not testimonial:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bewertung nicht gefunden."
             )
-        return Testimonial(**testimonial)
-    except HTTPException:
-        raise
-    except Exception as e:
+        return testimonial
+    except PyMongoError as e:
         logger.error(f"Error fetching testimonial {testimonial_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -64,13 +74,13 @@ async def get_testimonial(testimonial_id: str):
         )
 
 @router.post("/", response_model=Testimonial, status_code=status.HTTP_201_CREATED)
-async def create_testimonial(testimonial_data: TestimonialCreate):
+async def create_testimonial(testimonial_data: TestimonialCreate, db=Depends(get_db)):
     """
     Create a new testimonial (requires admin approval).
     """
     try:
-        testimonial = Testimonial(**testimonial_data.dict())
-        testimonial_dict = testimonial.dict()
+        testimonial = Testimonial(**testimonial_data.model_dump())
+        testimonial_dict = testimonial.model_dump()
         result = await db.testimonials.insert_one(testimonial_dict)
         
         if not result.inserted_id:
@@ -79,10 +89,11 @@ async def create_testimonial(testimonial_data: TestimonialCreate):
                 detail="Fehler beim Speichern der Bewertung."
             )
         
+        invalidate_testimonials_cache()
         logger.info(f"New testimonial created: {testimonial.id}")
         return testimonial
         
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error creating testimonial: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -90,7 +101,7 @@ async def create_testimonial(testimonial_data: TestimonialCreate):
         )
 
 @router.put("/{testimonial_id}/approve")
-async def approve_testimonial(testimonial_id: str):
+async def approve_testimonial(testimonial_id: str, db=Depends(get_db)):
     """
     Approve a testimonial (admin only).
     """
@@ -106,12 +117,11 @@ async def approve_testimonial(testimonial_id: str):
                 detail="Bewertung nicht gefunden."
             )
         
+        invalidate_testimonials_cache()
         logger.info(f"Testimonial approved: {testimonial_id}")
         return {"success": True, "message": "Bewertung erfolgreich genehmigt."}
         
-    except HTTPException:
-        raise
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error approving testimonial {testimonial_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -119,13 +129,13 @@ async def approve_testimonial(testimonial_id: str):
         )
 
 @router.put("/{testimonial_id}", response_model=Testimonial)
-async def update_testimonial(testimonial_id: str, testimonial_update: TestimonialUpdate):
+async def update_testimonial(testimonial_id: str, testimonial_update: TestimonialUpdate, db=Depends(get_db)):
     """
     Update a testimonial (admin only).
     """
     try:
         # Only update non-None fields
-        update_data = {k: v for k, v in testimonial_update.dict().items() if v is not None}
+        update_data = testimonial_update.model_dump(exclude_none=True)
         
         if not update_data:
             raise HTTPException(
@@ -133,24 +143,24 @@ async def update_testimonial(testimonial_id: str, testimonial_update: Testimonia
                 detail="Keine Daten zum Aktualisieren bereitgestellt."
             )
         
-        result = await db.testimonials.update_one(
+        # Update and fetch the new version in a single round trip
+        updated_testimonial = await db.testimonials.find_one_and_update(
             {"id": testimonial_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if updated_testimonial is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bewertung nicht gefunden."
             )
         
-        # Return updated testimonial
-        updated_testimonial = await db.testimonials.find_one({"id": testimonial_id})
-        return Testimonial(**updated_testimonial)
+        invalidate_testimonials_cache()
+        return updated_testimonial
         
-    except HTTPException:
-        raise
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error updating testimonial {testimonial_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -158,7 +168,7 @@ async def update_testimonial(testimonial_id: str, testimonial_update: Testimonia
         )
 
 @router.delete("/{testimonial_id}")
-async def delete_testimonial(testimonial_id: str):
+async def delete_testimonial(testimonial_id: str, db=Depends(get_db)):
     """
     Delete a testimonial (admin only).
     """
@@ -171,12 +181,11 @@ async def delete_testimonial(testimonial_id: str):
                 detail="Bewertung nicht gefunden."
             )
         
+        invalidate_testimonials_cache()
         logger.info(f"Testimonial deleted: {testimonial_id}")
         return {"success": True, "message": "Bewertung erfolgreich gelöscht."}
         
-    except HTTPException:
-        raise
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error deleting testimonial {testimonial_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
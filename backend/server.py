@@ -1,24 +1,28 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import time
+import asyncio
 import logging
+import orjson
 from pathlib import Path
 from contextlib import asynccontextmanager
 
-# Import route modules
-from routes.contact import router as contact_router
-from routes.services import router as services_router  
-from routes.testimonials import router as testimonials_router
-
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Import route modules (after the environment is loaded)
+from routes.contact import router as contact_router
+from routes.services import router as services_router
+from routes.testimonials import router as testimonials_router
+from utils.email_service import email_service
+
+# MongoDB connection settings
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+db_name = os.environ['DB_NAME']
 
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
@@ -26,6 +30,17 @@ async def lifespan(app: FastAPI):
     # Startup
     logging.info("🚀 Starting Stinex Backend Server...")
     
+    # Single Motor client (and connection pool) shared by all routers
+    app.state.client = AsyncIOMotorClient(
+        mongo_url,
+        maxPoolSize=100,
+        retryWrites=True,
+        retryReads=True
+    )
+    app.state.db = app.state.client[db_name]
+    client = app.state.client
+    db = app.state.db
+    
     # Test database connection
     try:
         await client.admin.command('ping')
@@ -34,17 +49,29 @@ async def lifespan(app: FastAPI):
         logging.error(f"❌ MongoDB connection failed: {e}")
         raise
     
+    from database.seed_data import create_indexes, seed_database
+    
+    # Ensure indexes on every startup (idempotent), before any seeding upserts
+    try:
+        await create_indexes(db)
+    except Exception as e:
+        logging.warning(f"⚠️ Index creation failed (continuing anyway): {e}")
+    
     # Run database seeding if needed
     try:
-        from database.seed_data import seed_database
-        # Only seed if collections are empty
-        contacts_count = await db.contacts.count_documents({})
-        services_count = await db.services.count_documents({})
-        testimonials_count = await db.testimonials.count_documents({})
+        # Only seed if collections are empty (metadata counts, fetched concurrently)
+        services_count, testimonials_count = await asyncio.gather(
+            db.services.estimated_document_count(),
+            db.testimonials.estimated_document_count(),
+        )
         
         if services_count == 0 or testimonials_count == 0:
             logging.info("🌱 Seeding database with initial data...")
-            await seed_database()
+            await seed_database(
+                db,
+                services=services_count == 0,
+                testimonials=testimonials_count == 0
+            )
     except Exception as e:
         logging.warning(f"⚠️ Database seeding failed (continuing anyway): {e}")
     
@@ -52,6 +79,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logging.info("🛑 Shutting down Stinex Backend Server...")
+    await email_service.close()
     client.close()
 
 # Create the main app with lifespan
@@ -59,6 +87,7 @@ app = FastAPI(
     title="Stinex Cleaning Service API",
     description="Backend API for Stinex cleaning service website",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -74,18 +103,40 @@ async def root():
         "status": "healthy"
     }
 
+# Health checks are polled by load balancers; ping MongoDB at most once per interval
+HEALTH_CHECK_INTERVAL = 1.0
+# Keep a stalled ping from queueing every probe behind the lock (Motor's server selection waits 30s)
+HEALTH_CHECK_TIMEOUT = 1.0
+HEALTHY_BODY = orjson.dumps({
+    "status": "healthy",
+    "database": "connected",
+    "timestamp": "2025-01-28T21:45:00Z"
+})
+_health_lock = asyncio.Lock()
+_last_ping_at = float("-inf")
+_last_ping_error = None
+
+async def ping_database(client):
+    """Return the error from the most recent ping (None if healthy), pinging only when stale."""
+    global _last_ping_at, _last_ping_error
+    async with _health_lock:
+        if time.monotonic() - _last_ping_at >= HEALTH_CHECK_INTERVAL:
+            try:
+                await asyncio.wait_for(client.admin.command('ping'), HEALTH_CHECK_TIMEOUT)
+                _last_ping_error = None
+            except Exception as e:
+                # Any failure, including a timeout, reports the database as unavailable (503)
+                _last_ping_error = e
+            _last_ping_at = time.monotonic()
+    return _last_ping_error
+
 @api_router.get("/health")
-async def health_check():
-    try:
-        # Test database connection
-        await client.admin.command('ping')
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "timestamp": "2025-01-28T21:45:00Z"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
+async def health_check(request: Request):
+    error = await ping_database(request.app.state.client)
+    if error is not None:
+        raise HTTPException(status_code=503, detail=f"Database connection failed: {str(error) or type(error).__name__}")
+    # Fresh Response per request (middleware mutates headers), but the body is serialized once
+    return Response(content=HEALTHY_BODY, media_type="application/json")
 
 # Include all route modules
 api_router.include_router(contact_router)
@@ -114,19 +165,26 @@ logger = logging.getLogger(__name__)
 # Exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return {
-        "success": False,
-        "error": "http_error",
-        "message": exc.detail,
-        "status_code": exc.status_code
-    }
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={
+            "success": False,
+            "error": "http_error",
+            "message": exc.detail,
+            "status_code": exc.status_code
+        },
+        headers=exc.headers
+    )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     logger.error(f"Unhandled exception: {str(exc)}")
-    return {
-        "success": False,
-        "error": "internal_error",
-        "message": "Ein unerwarteter Fehler ist aufgetreten.",
-        "status_code": 500
-    }
\ No newline at end of file
+    return ORJSONResponse(
+        status_code=500,
+        content={
+            "success": False,
+            "error": "internal_error",
+            "message": "Ein unerwarteter Fehler ist aufgetreten.",
+            "status_code": 500
+        }
+    )
\ No newline at end of file
@@ -3,173 +3,331 @@ Email service for sending notifications about contact form submissions.
 This is a basic implementation - in production, you would use a proper email service.
 """
 
-import smtplib
+import asyncio
+import collections
+import hashlib
+import html
+import json
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import random
+import string
+import time
+import aiosmtplib
+from dataclasses import dataclass
+from email.message import EmailMessage
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+_TIMESTAMP_FORMAT = '%d.%m.%Y um %H:%M'
+
+_SEND_ATTEMPTS = 3
+
+def _is_transient(exc: Exception) -> bool:
+    """Connection drops, timeouts and 4xx replies (e.g. greylisting) are worth retrying."""
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        return 400 <= exc.code < 500
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        # Greylisting usually answers RCPT with 450; retry only if every refusal is temporary
+        return bool(exc.recipients) and all(400 <= r.code < 500 for r in exc.recipients)
+    return isinstance(exc, OSError)
+
+# Identical submissions (same email, service and message) within this window are sent once
+_DEDUPE_TTL = 60
+_DEDUPE_MAX_ENTRIES = 1024
+
+def _submission_key(contact_data: dict) -> bytes:
+    """Stable hash identifying a submission for double-submit detection."""
+    payload = json.dumps(
+        [contact_data.get('email'), contact_data.get('service'), contact_data.get('message')]
+    ).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+def _sanitize(data: dict) -> dict:
+    """HTML-escape every submitted value once; missing (None) values are dropped."""
+    return {k: html.escape(str(v), quote=True) for k, v in data.items() if v is not None}
+
+# Shared chrome for all emails; $content and $footer are filled per email type
+_LAYOUT = string.Template("""
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+$content
+        
+        <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #e2e8f0; color: #64748b; font-size: 14px;">
+$footer
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+_CONTACT_CONTENT = """        <h2 style="color: #2563eb;">Neue Kontaktanfrage - Stinex</h2>
+        
+        <div style="background-color: #f8fafc; padding: 20px; border-radius: 8px; margin: 20px 0;">
+            <h3 style="margin-top: 0; color: #1e40af;">Kontaktdaten:</h3>
+            <p><strong>Name:</strong> $name</p>
+            <p><strong>E-Mail:</strong> $email</p>
+            <p><strong>Telefon:</strong> $phone</p>
+            <p><strong>Gewünschte Leistung:</strong> $service</p>
+        </div>
+        
+        <div style="background-color: #fff; border-left: 4px solid #2563eb; padding: 20px; margin: 20px 0;">
+            <h3 style="margin-top: 0; color: #1e40af;">Nachricht:</h3>
+            <p style="white-space: pre-wrap;">$message</p>
+        </div>"""
+
+_CONTACT_FOOTER = """            <p>Diese Anfrage wurde am $timestamp über die Stinex-Website eingereicht.</p>"""
+
+_CONFIRMATION_CONTENT = """        <h2 style="color: #2563eb;">Vielen Dank für Ihre Anfrage!</h2>
+        
+        <p>Liebe/r $name,</p>
+        
+        <p>vielen Dank für Ihr Interesse an den Reinigungsdienstleistungen von Stinex. 
+        Wir haben Ihre Anfrage erhalten und werden uns innerhalb von 24 Stunden bei Ihnen melden.</p>
+        
+        <div style="background-color: #f8fafc; padding: 20px; border-radius: 8px; margin: 20px 0;">
+            <h3 style="margin-top: 0; color: #1e40af;">Ihre Anfrage im Überblick:</h3>
+            <p><strong>Gewünschte Leistung:</strong> $service</p>
+            <p><strong>Eingereicht am:</strong> $timestamp</p>
+        </div>
+        
+        <p>Bei dringenden Fragen erreichen Sie uns unter:</p>
+        <ul>
+            <li><strong>Telefon:</strong> +49 123 456 789</li>
+            <li><strong>E-Mail:</strong> info@stinex.de</li>
+            <li><strong>Notfall-Hotline:</strong> +49 123 456 000</li>
+        </ul>
+        
+        <p>Mit freundlichen Grüßen,<br>
+        Ihr Stinex-Team</p>"""
+
+_CONFIRMATION_FOOTER = """            <p>Stinex Reinigungsservice<br>
+            Musterstraße 123<br>
+            20095 Hamburg<br>
+            www.stinex.de</p>"""
+
+# Layout and fragments are flattened once at import, so each email needs a single substitution.
+# Values are HTML-escaped before substitution.
+_CONTACT_TEMPLATE = string.Template(_LAYOUT.substitute(content=_CONTACT_CONTENT, footer=_CONTACT_FOOTER))
+_CONFIRMATION_TEMPLATE = string.Template(_LAYOUT.substitute(content=_CONFIRMATION_CONTENT, footer=_CONFIRMATION_FOOTER))
+
+@dataclass(frozen=True, slots=True)
+class _Config:
+    """SMTP settings, read from the environment once at import."""
+    smtp_host: str
+    smtp_port: int
+    smtp_user: str
+    smtp_password: str
+    from_email: str
+    admin_email: str
+    # Contact form emails go to user-supplied addresses from a public endpoint, so they are opt-in
+    contact_emails_enabled: bool
+
+_CONFIG = _Config(
+    smtp_host=os.getenv("EMAIL_HOST", "localhost"),
+    smtp_port=int(os.getenv("EMAIL_PORT", "587")),
+    smtp_user=os.getenv("EMAIL_USER", ""),
+    smtp_password=os.getenv("EMAIL_PASS", ""),
+    from_email=os.getenv("FROM_EMAIL", "info@stinex.de"),
+    admin_email=os.getenv("ADMIN_EMAIL", "admin@stinex.de"),
+    contact_emails_enabled=os.getenv("CONTACT_EMAILS_ENABLED", "false").lower() in ("1", "true", "yes")
+)
+
 class EmailService:
+    __slots__ = ('cfg', '_smtp', '_smtp_lock', '_recent')
+    
     def __init__(self):
-        self.smtp_host = os.getenv("EMAIL_HOST", "localhost")
-        self.smtp_port = int(os.getenv("EMAIL_PORT", "587"))
-        self.smtp_user = os.getenv("EMAIL_USER", "")
-        self.smtp_password = os.getenv("EMAIL_PASS", "")
-        self.from_email = os.getenv("FROM_EMAIL", "info@stinex.de")
-        self.admin_email = os.getenv("ADMIN_EMAIL", "admin@stinex.de")
-        
-    def send_contact_notification(self, contact_data: dict) -> bool:
+        self.cfg = _CONFIG
+        
+        # Persistent SMTP connection, reused across sends
+        self._smtp = None
+        self._smtp_lock = asyncio.Lock()
+        
+        # Recent submissions (key -> (monotonic start time, future of the send outcome)), to drop double-submits
+        self._recent = collections.OrderedDict()
+    
+    async def _connect_smtp(self) -> aiosmtplib.SMTP:
+        """Open and authenticate a new SMTP connection."""
+        server = aiosmtplib.SMTP(
+            hostname=self.cfg.smtp_host,
+            port=self.cfg.smtp_port,
+            start_tls=True,
+            username=self.cfg.smtp_user,
+            password=self.cfg.smtp_password
+        )
+        await server.connect()
+        return server
+    
+    async def _get_smtp(self) -> aiosmtplib.SMTP:
+        """Return the cached SMTP connection, reconnecting if it is missing or dead (caller holds the lock)."""
+        try:
+            await self._smtp.noop()
+        except (AttributeError, aiosmtplib.SMTPException, OSError):
+            self._discard_smtp()
+            self._smtp = await self._connect_smtp()
+        return self._smtp
+    
+    def _discard_smtp(self):
+        """Close the cached connection without QUIT and forget it (caller holds the lock)."""
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+            self._smtp = None
+    
+    async def close(self):
+        """Close the cached SMTP connection, if any."""
+        async with self._smtp_lock:
+            if self._smtp is not None:
+                try:
+                    await self._smtp.quit()
+                except (aiosmtplib.SMTPException, OSError):
+                    pass
+                self._smtp = None
+    
+    async def _send_messages(self, *messages):
         """
-        Send email notification when a new contact form is submitted.
+        Send messages in one session over the cached connection.
         
-        Args:
-            contact_data: Dictionary containing contact form data
-            
-        Returns:
-            bool: True if email sent successfully, False otherwise
+        Transient failures (dropped connections, timeouts, 4xx/greylisting replies) are
+        retried with exponential backoff and jitter; messages already accepted by the
+        server are not resent. Permanent failures are raised immediately.
         """
-        try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = self.admin_email
-            msg['Subject'] = f"Neue Kontaktanfrage von {contact_data.get('name', 'Unbekannt')}"
-            
-            # Email body
-            body = self._create_contact_email_body(contact_data)
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Send email (only if SMTP is configured)
-            if self.smtp_user and self.smtp_password:
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_user, self.smtp_password)
-                    server.send_message(msg)
-                    
-                logger.info(f"Contact notification email sent for {contact_data.get('name')}")
-                return True
-            else:
-                logger.info("SMTP not configured, skipping email notification")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Failed to send contact notification email: {str(e)}")
-            return False
+        pending = list(messages)
+        for attempt in range(_SEND_ATTEMPTS):
+            async with self._smtp_lock:
+                try:
+                    server = await self._get_smtp()
+                    while pending:
+                        await server.send_message(pending[0])
+                        pending.pop(0)
+                    return
+                except Exception as e:
+                    if not _is_transient(e) or attempt == _SEND_ATTEMPTS - 1:
+                        raise
+                    self._discard_smtp()
+                    logger.warning("Transient SMTP error (attempt %d/%d): %s", attempt + 1, _SEND_ATTEMPTS, e)
+            await asyncio.sleep(0.5 * 2 ** attempt + random.random() * 0.1)
+    
+    def _build_message(self, to_addr: str, subject: str, html_body: str) -> EmailMessage:
+        """Build a single-part HTML message."""
+        msg = EmailMessage()
+        msg['From'] = self.cfg.from_email
+        msg['To'] = to_addr
+        msg['Subject'] = subject
+        msg.set_content(html_body, subtype='html')
+        return msg
     
-    def send_confirmation_email(self, contact_data: dict) -> bool:
+    def _notification_message(self, contact_data: dict, escaped_data: dict, now_str: str) -> EmailMessage:
+        """Build the admin notification for a contact submission."""
+        return self._build_message(
+            self.cfg.admin_email,
+            f"Neue Kontaktanfrage von {contact_data.get('name', 'Unbekannt')}",
+            self._create_contact_email_body(escaped_data, now_str)
+        )
+    
+    def _confirmation_message(self, contact_data: dict, escaped_data: dict, now_str: str) -> EmailMessage:
+        """Build the customer confirmation for a contact submission."""
+        return self._build_message(
+            contact_data.get('email'),
+            "Ihre Anfrage bei Stinex - Bestätigung",
+            self._create_confirmation_email_body(escaped_data, now_str)
+        )
+    
+    def _recent_send(self, key: bytes):
+        """Return the future of a matching send within the dedupe window, or None after registering a new one."""
+        now = time.monotonic()
+        
+        # Entries are kept in insertion order, so expired ones sit at the front;
+        # sends still in flight stay until they resolve, or duplicates would resend
+        expired = []
+        for recent_key, (started, pending) in self._recent.items():
+            if now - started < _DEDUPE_TTL:
+                break
+            if pending.done():
+                expired.append(recent_key)
+        for recent_key in expired:
+            del self._recent[recent_key]
+        
+        entry = self._recent.get(key)
+        if entry is not None:
+            return entry[1]
+        
+        self._recent[key] = (now, asyncio.get_running_loop().create_future())
+        if len(self._recent) > _DEDUPE_MAX_ENTRIES:
+            self._recent.popitem(last=False)
+        return None
+    
+    async def send_submission_emails(self, contact_data: dict) -> bool:
         """
-        Send confirmation email to the customer who submitted the contact form.
+        Send the admin notification and the customer confirmation in a single SMTP session.
+        
+        Runs as a background task, so no exception ever escapes.
         
         Args:
             contact_data: Dictionary containing contact form data
             
         Returns:
-            bool: True if email sent successfully, False otherwise
+            bool: True if both emails were sent successfully, False otherwise
         """
+        # Skip rendering entirely when SMTP is not configured
+        if not (self.cfg.smtp_user and self.cfg.smtp_password):
+            logger.info("SMTP not configured, skipping submission emails")
+            return False
+        
+        key = _submission_key(contact_data)
+        previous = self._recent_send(key)
+        if previous is not None:
+            # Report the outcome of the original send, waiting for it if still in flight
+            logger.info("Duplicate submission from %s within %ss, skipping emails", contact_data.get('email'), _DEDUPE_TTL)
+            return await asyncio.shield(previous)
+        future = self._recent[key][1]
+        sent = False
+        
         try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = contact_data.get('email')
-            msg['Subject'] = "Ihre Anfrage bei Stinex - Bestätigung"
+            # One timestamp for both emails so they always agree
+            now_str = datetime.now().strftime(_TIMESTAMP_FORMAT)
+            escaped_data = _sanitize(contact_data)
+            await self._send_messages(
+                self._notification_message(contact_data, escaped_data, now_str),
+                self._confirmation_message(contact_data, escaped_data, now_str)
+            )
+            logger.info("Submission emails sent for %s", contact_data.get('name'))
+            sent = True
             
-            # Email body
-            body = self._create_confirmation_email_body(contact_data)
-            msg.attach(MIMEText(body, 'html'))
+        except Exception:
+            logger.exception("Failed to send submission emails")
             
-            # Send email (only if SMTP is configured)
-            if self.smtp_user and self.smtp_password:
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_user, self.smtp_password)
-                    server.send_message(msg)
-                    
-                logger.info(f"Confirmation email sent to {contact_data.get('email')}")
-                return True
-            else:
-                logger.info("SMTP not configured, skipping confirmation email")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Failed to send confirmation email: {str(e)}")
-            return False
+        finally:
+            entry = self._recent.get(key)
+            if not sent and entry is not None and entry[1] is future:
+                # Let a later resubmission try again, without dropping a newer send's entry
+                self._recent.pop(key)
+            # Always resolve, so waiting duplicates get the real outcome even on cancellation
+            future.set_result(sent)
+        return sent
     
-    def _create_contact_email_body(self, contact_data: dict) -> str:
-        """Create HTML email body for contact notification."""
-        service = contact_data.get('service', 'Nicht angegeben')
-        phone = contact_data.get('phone', 'Nicht angegeben')
-        
-        return f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2563eb;">Neue Kontaktanfrage - Stinex</h2>
-                
-                <div style="background-color: #f8fafc; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3 style="margin-top: 0; color: #1e40af;">Kontaktdaten:</h3>
-                    <p><strong>Name:</strong> {contact_data.get('name', 'Nicht angegeben')}</p>
-                    <p><strong>E-Mail:</strong> {contact_data.get('email', 'Nicht angegeben')}</p>
-                    <p><strong>Telefon:</strong> {phone}</p>
-                    <p><strong>Gewünschte Leistung:</strong> {service}</p>
-                </div>
-                
-                <div style="background-color: #fff; border-left: 4px solid #2563eb; padding: 20px; margin: 20px 0;">
-                    <h3 style="margin-top: 0; color: #1e40af;">Nachricht:</h3>
-                    <p style="white-space: pre-wrap;">{contact_data.get('message', 'Keine Nachricht')}</p>
-                </div>
-                
-                <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #e2e8f0;">
-                    <p style="color: #64748b; font-size: 14px;">
-                        Diese Anfrage wurde am {datetime.now().strftime('%d.%m.%Y um %H:%M')} über die Stinex-Website eingereicht.
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+    def _create_contact_email_body(self, escaped_data: dict, now_str: str) -> str:
+        """Create HTML email body for contact notification from already-escaped data."""
+        return _CONTACT_TEMPLATE.substitute(
+            name=escaped_data.get('name') or 'Nicht angegeben',
+            email=escaped_data.get('email') or 'Nicht angegeben',
+            phone=escaped_data.get('phone') or 'Nicht angegeben',
+            service=escaped_data.get('service') or 'Nicht angegeben',
+            message=escaped_data.get('message') or 'Keine Nachricht',
+            timestamp=now_str
+        )
     
-    def _create_confirmation_email_body(self, contact_data: dict) -> str:
-        """Create HTML email body for customer confirmation."""
-        return f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2563eb;">Vielen Dank für Ihre Anfrage!</h2>
-                
-                <p>Liebe/r {contact_data.get('name', 'Kunde/Kundin')},</p>
-                
-                <p>vielen Dank für Ihr Interesse an den Reinigungsdienstleistungen von Stinex. 
-                Wir haben Ihre Anfrage erhalten und werden uns innerhalb von 24 Stunden bei Ihnen melden.</p>
-                
-                <div style="background-color: #f8fafc; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3 style="margin-top: 0; color: #1e40af;">Ihre Anfrage im Überblick:</h3>
-                    <p><strong>Gewünschte Leistung:</strong> {contact_data.get('service', 'Nicht angegeben')}</p>
-                    <p><strong>Eingereicht am:</strong> {datetime.now().strftime('%d.%m.%Y um %H:%M')}</p>
-                </div>
-                
-                <p>Bei dringenden Fragen erreichen Sie uns unter:</p>
-                <ul>
-                    <li><strong>Telefon:</strong> +49 123 456 789</li>
-                    <li><strong>E-Mail:</strong> info@stinex.de</li>
-                    <li><strong>Notfall-Hotline:</strong> +49 123 456 000</li>
-                </ul>
-                
-                <p>Mit freundlichen Grüßen,<br>
-                Ihr Stinex-Team</p>
-                
-                <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #e2e8f0; color: #64748b; font-size: 14px;">
-                    <p>Stinex Reinigungsservice<br>
-                    Musterstraße 123<br>
-                    20095 Hamburg<br>
-                    www.stinex.de</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+    def _create_confirmation_email_body(self, escaped_data: dict, now_str: str) -> str:
+        """Create HTML email body for customer confirmation from already-escaped data."""
+        return _CONFIRMATION_TEMPLATE.substitute(
+            name=escaped_data.get('name') or 'Kunde/Kundin',
+            service=escaped_data.get('service') or 'Nicht angegeben',
+            timestamp=now_str
+        )
 
 # Global email service instance
 email_service = EmailService()
\ No newline at end of file
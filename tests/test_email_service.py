@@ -0,0 +1,70 @@
+import asyncio
+import dataclasses
+
+import aiosmtplib
+
+from utils import email_service as email_module
+from utils.email_service import EmailService, _is_transient
+
+CONTACT = {
+    "name": "Max Mustermann",
+    "email": "max@example.com",
+    "phone": "+49 123 456789",
+    "service": "Büroreinigung",
+    "message": "Bitte um ein Angebot.",
+}
+
+
+def _refused(code):
+    return aiosmtplib.SMTPRecipientsRefused(
+        [aiosmtplib.SMTPRecipientRefused(code, "refused", "max@example.com")]
+    )
+
+
+def test_recipients_refused_with_450_is_transient():
+    # Greylisting answers RCPT with 450, which is worth retrying
+    assert _is_transient(_refused(450))
+
+
+def test_recipients_refused_with_550_is_permanent():
+    assert not _is_transient(_refused(550))
+
+
+class GatedEmailService(EmailService):
+    """Holds every send until the test releases it, then reports the configured outcome."""
+
+    def __init__(self, succeed):
+        super().__init__()
+        self.cfg = dataclasses.replace(email_module._CONFIG, smtp_user="user", smtp_password="secret")
+        self.succeed = succeed
+        self.release = asyncio.Event()
+        self.sends = 0
+
+    async def _send_messages(self, *messages):
+        self.sends += 1
+        await self.release.wait()
+        if not self.succeed:
+            raise aiosmtplib.SMTPResponseException(550, "mailbox unavailable")
+
+
+async def _send_twice(service):
+    first = asyncio.create_task(service.send_submission_emails(dict(CONTACT)))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(service.send_submission_emails(dict(CONTACT)))
+    await asyncio.sleep(0)
+    service.release.set()
+    return await asyncio.gather(first, second)
+
+
+def test_duplicate_in_flight_gets_the_real_success():
+    service = GatedEmailService(succeed=True)
+    assert asyncio.run(_send_twice(service)) == [True, True]
+    assert service.sends == 1
+
+
+def test_duplicate_in_flight_gets_the_real_failure():
+    service = GatedEmailService(succeed=False)
+    assert asyncio.run(_send_twice(service)) == [False, False]
+    assert service.sends == 1
+    # A failed send is forgotten, so a later resubmission tries again
+    assert not service._recent
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from routes import services, testimonials
+
+DOCUMENTS = [{"id": "one"}, {"id": "two"}]
+
+
+class FakeCursor:
+    """Async cursor that runs `during_read` after yielding the first document."""
+
+    def __init__(self, documents, during_read=None):
+        self.documents = documents
+        self.during_read = during_read
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    async def __aiter__(self):
+        for index, document in enumerate(self.documents):
+            yield document
+            if index == 0 and self.during_read is not None:
+                self.during_read()
+
+
+class FakeCollection:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.finds = 0
+
+    def find(self, *args):
+        self.finds += 1
+        return self.cursor
+
+
+class FakeDB:
+    def __init__(self, collection):
+        self.services = collection
+        self.testimonials = collection
+
+
+ROUTES = [
+    (services.get_services, services.services_cache, services.invalidate_services_cache),
+    (testimonials.get_testimonials, testimonials.testimonials_cache, testimonials.invalidate_testimonials_cache),
+]
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    for _, cache, _ in ROUTES:
+        cache.clear()
+    yield
+    for _, cache, _ in ROUTES:
+        cache.clear()
+
+
+@pytest.mark.parametrize("get_list, cache, invalidate", ROUTES)
+def test_read_is_cached(get_list, cache, invalidate):
+    collection = FakeCollection(FakeCursor(DOCUMENTS))
+    db = FakeDB(collection)
+
+    assert asyncio.run(get_list(True, db=db)) == DOCUMENTS
+    assert asyncio.run(get_list(True, db=db)) == DOCUMENTS
+    assert collection.finds == 1
+
+
+@pytest.mark.parametrize("get_list, cache, invalidate", ROUTES)
+def test_write_during_read_blocks_cache_store(get_list, cache, invalidate):
+    collection = FakeCollection(FakeCursor(DOCUMENTS, during_read=invalidate))
+
+    assert asyncio.run(get_list(True, db=FakeDB(collection))) == DOCUMENTS
+    # The read started before the write, so its (possibly stale) result must not be cached
+    assert True not in cache